@@ -2,11 +2,16 @@
 
 import argparse
 import os
+import shutil
+import time
 
 import colorama
 
-from .communication import Communicator, connection
-from .utils import address_valid, set_working_directory
+from .communication import ChecksumError, Communicator, connection
+from .utils import (address_valid, human_size, human_time,
+                    set_working_directory)
+
+PLAN_ORDERS = ["server", "smallest", "largest"]
 
 
 class MusicSenderClient(Communicator):
@@ -61,10 +66,95 @@ class MusicSenderClient(Communicator):
         songs = self.songs_list()
         return list(filter(lambda song: song[1] not in os.listdir("."), songs))
 
+    @connection
+    def songs_metadata_list(self) -> list[tuple[int, str, int, float]]:
+        """Makes a 'list-meta' request to the server.
+
+        Returns:
+            A list containing tuples that contains respectively the
+            song's index, name, size in bytes and modification time.
+            The list is empty if there are no songs in the server.
+
+        Raises:
+            BrokenPipeError:
+                When the remote closes connection to this remote.
+
+            ConnectionResetError:
+                When the remote doesn't closes connection properly.
+        """
+
+        self.send(b"list-meta")
+
+        raw_songs_msg = self.recv().decode()
+        if raw_songs_msg == "no-song-available":
+            return []
+
+        songs = []
+        for index, entry in enumerate(raw_songs_msg.split("$sep")):
+            # Song names may contain ':', but size and mtime don't.
+            name, size, mtime = entry.rsplit(":", 2)
+            songs.append((index, name, int(size), float(mtime)))
+        return songs
+
+    def missing_songs_metadata_list(self) \
+            -> list[tuple[int, str, int, float]]:
+        """Make a 'list-meta' request to the server and returns only
+        the songs that aren't in the client current directory.
+
+        Returns:
+            A list containing tuples that contains respectively the
+            song's index, name, size in bytes and modification time.
+
+        Raises:
+            BrokenPipeError:
+                When the remote closes connection to this remote.
+
+            ConnectionResetError:
+                When the remote doesn't closes connection properly.
+        """
+
+        local_songs = set(os.listdir("."))
+        return [song for song in self.songs_metadata_list()
+                if song[1] not in local_songs]
+
+    @connection
+    def search_songs(self, query: str) -> list[tuple[int, str]]:
+        """Makes a 'search <query>' request to the server.
+
+        Args:
+            query: Words to be looked up in the songs' names.
+
+        Returns:
+            A list containing tuples that contains respectively the
+            song's index and name of each matching song.
+
+        Raises:
+            BrokenPipeError:
+                When the remote closes connection to this remote.
+
+            ConnectionResetError:
+                When the remote doesn't closes connection properly.
+        """
+
+        self.send(f"search {query}".encode())
+
+        raw_songs_msg = self.recv().decode()
+        if raw_songs_msg == "no-song-matched":
+            return [(0, "")]
+
+        songs = []
+        for entry in raw_songs_msg.split("$sep"):
+            index, song = entry.split(":", 1)
+            songs.append((int(index), song))
+        return songs
+
     @connection
     def request_song(self, index: int):
         """Makes a 'request <index>' request to the server.
 
+        The song is verified against the checksums sent by the server
+        and its corrupted segments, if any, are requested again.
+
         Args:
             index: The requested index from which the song comes from.
 
@@ -72,6 +162,10 @@ class MusicSenderClient(Communicator):
             IndexError: When the user requests a song from an out of
                         bounds index.
 
+            ChecksumError:
+                When the song is still corrupted after requesting its
+                corrupted segments again.
+
             BrokenPipeError:
                 When the remote closes connection to this remote.
 
@@ -80,7 +174,59 @@ class MusicSenderClient(Communicator):
         """
 
         self.send(f"request {index}".encode())
-        self.recvfile()
+        try:
+            self.recvfile()
+        except ChecksumError as error:
+            # Only the corrupted segments are requested again. If they
+            # are still corrupted, the song is discarded.
+            part_filename = error.filename + self.PART_SUFFIX
+            try:
+                for segment, checksum in error.segments.items():
+                    self.send(f"segment {index} {segment}".encode())
+                    self.recvsegment(error.filename, segment, checksum)
+            except BaseException:
+                os.remove(part_filename)
+                raise
+            os.replace(part_filename, error.filename)
+
+
+def plan_downloads(songs: list[tuple[int, str, int, float]], order: str,
+                   free_space: int) \
+        -> tuple[list[tuple[int, str, int, float]],
+                 list[tuple[int, str, int, float]]]:
+    """Orders a download queue and fits it into the available disk
+    space.
+
+    Args:
+        songs: list of tuples as returned by
+               MusicSenderClient.songs_metadata_list().
+
+        order: One of PLAN_ORDERS. 'smallest' downloads the smallest
+               songs first, completing the most songs per minute.
+               'largest' downloads the biggest songs first. 'server'
+               keeps the server's order.
+
+        free_space: Amount of bytes available for the downloads.
+
+    Returns:
+        A tuple containing respectively the ordered list of songs that
+        fit into free_space and the list of songs left out.
+    """
+
+    if order == "smallest":
+        songs = sorted(songs, key=lambda song: song[2])
+    elif order == "largest":
+        songs = sorted(songs, key=lambda song: song[2], reverse=True)
+
+    planned, left_out = [], []
+    planned_size = 0
+    for song in songs:
+        if planned_size + song[2] <= free_space:
+            planned.append(song)
+            planned_size += song[2]
+        else:
+            left_out.append(song)
+    return planned, left_out
 
 
 def songs_list_out(songs_list: list[tuple[int, str]], title="Songs List") \
@@ -163,14 +309,28 @@ def request_song_out(s_index: str, client: MusicSenderClient) -> bool:
         return True
 
 
-def request_missing_out(client: MusicSenderClient):
+def request_missing_out(client: MusicSenderClient, order: str = "server",
+                        trim: bool = False):
     """Requests all the musics that are not in the client current
     directory and prints the progress of the request. It also shows
     errors if any.
 
+    The download queue is planned beforehand (see plan_downloads()),
+    so the request is refused when the songs don't fit into the free
+    disk space, unless trim is given, in which case the songs that
+    don't fit are left out.
+
     Args:
         client:
             A MusicSenderClient instance used to make the requests.
+
+        order:
+            One of PLAN_ORDERS, the order in which the songs are
+            downloaded.
+
+        trim:
+            Whether songs that don't fit into the free disk space
+            should be left out instead of refusing the whole request.
     Raises:
         ConnectionRefusedError:
             It happens when the given address isn't listening and the
@@ -181,11 +341,82 @@ def request_missing_out(client: MusicSenderClient):
             crashes.
     """
 
+    missing_songs = client.missing_songs_metadata_list()
+    if not missing_songs:
+        print(colorama.Fore.RED + colorama.Style.BRIGHT
+              + "There are no musics to be downloaded!")
+        return
+
+    free_space = shutil.disk_usage(".").free
+    planned, left_out = plan_downloads(missing_songs, order, free_space)
+    if left_out:
+        needed = sum(song[2] for song in missing_songs)
+        print(colorama.Fore.RED + colorama.Style.BRIGHT
+              + f"Missing songs need {human_size(needed)}, but only "
+              f"{human_size(free_space)} are free.")
+        if not trim:
+            print(colorama.Fore.RED + colorama.Style.BRIGHT
+                  + "Nothing was downloaded. Use --trim to download only "
+                  "the songs that fit.")
+            return
+        print(colorama.Fore.YELLOW + colorama.Style.BRIGHT
+              + f"Leaving out {len(left_out)} song(s).")
+
+    total_size = sum(song[2] for song in planned)
+    print(colorama.Fore.YELLOW + colorama.Style.BRIGHT
+          + f"Downloading {len(planned)} song(s), {human_size(total_size)}")
+
+    downloaded_size = 0
+    elapsed = 0.0
     print(colorama.Fore.GREEN + "-=" * 30)
-    for index, song in client.missing_songs_list():
+    for index, song, size, _ in planned:
+        print(colorama.Fore.YELLOW + colorama.Style.BRIGHT
+              + f"Downloading {song} ({human_size(size)})")
+        start = time.perf_counter()
+        try:
+            client.request_song(index)
+        except ConnectionError:
+            print(colorama.Fore.RED + colorama.Style.BRIGHT
+                  + f"Failed to download {song}. An error has occurred")
+        else:
+            print(colorama.Fore.GREEN + colorama.Style.BRIGHT
+                  + f"{song} Downloaded successfully")
+            downloaded_size += size
+        elapsed += time.perf_counter() - start
+        total_size -= size
+
+        if total_size and downloaded_size and elapsed:
+            throughput = downloaded_size / elapsed
+            print(colorama.Fore.YELLOW
+                  + f"{human_size(throughput)}/s, "
+                  f"ETA {human_time(total_size / throughput)}")
+        print(colorama.Fore.GREEN + "-=" * 30)
+
+
+def request_matching_out(pattern: str, client: MusicSenderClient):
+    """Requests all the musics matching the given pattern and prints
+    the progress of the request. It also shows errors if any.
+
+    Args:
+        pattern:
+            Words to be looked up in the songs' names.
+        client:
+            A MusicSenderClient instance used to make the requests.
+    Raises:
+        ConnectionRefusedError:
+            It happens when the given address isn't listening and the
+            client tries to requests something.
+
+        ConnectionResetError:
+            It happens when, in the middle of contact, the server
+            crashes.
+    """
+
+    print(colorama.Fore.GREEN + "-=" * 30)
+    for index, song in client.search_songs(pattern):
         if not song:
             print(colorama.Fore.RED + colorama.Style.BRIGHT
-                  + "There are no musics to be downloaded!")
+                  + f"There are no musics matching \"{pattern}\"!")
             break
 
         print(colorama.Fore.YELLOW + colorama.Style.BRIGHT
@@ -225,16 +456,22 @@ def handle_client_requests(args: argparse.Namespace, client: MusicSenderClient):
         songs_list_out(client.songs_list())
     if args.list_missing:
         songs_list_out(client.missing_songs_list(), "Missing Songs List")
+    if args.search:
+        songs_list_out(client.search_songs(args.search), "Search Results")
 
-    if args.request_song and args.request_missing:
+    if sum(map(bool, [args.request_song, args.request_missing,
+                      args.request_matching])) > 1:
         print(colorama.Fore.RED + colorama.Style.BRIGHT
-              + "request-song and request-missing should not be used together.")
+              + "request-song, request-missing and request-matching should "
+              "not be used together.")
         return
 
     if args.request_song:
         request_song_out(args.request_song, client)
     elif args.request_missing:
-        request_missing_out(client)
+        request_missing_out(client, args.order, args.trim)
+    elif args.request_matching:
+        request_matching_out(args.request_matching, client)
 
 # TODO: Look for ways to refactoring this code
 
@@ -265,6 +502,19 @@ def main():
     argp.add_argument(
         "-rm", "--request-missing", action="store_true",
         help="Requests all the missing songs.")
+    argp.add_argument(
+        "-s", "--search", default="",
+        help="Returns a list of songs whose names match the given words.")
+    argp.add_argument(
+        "-rmt", "--request-matching", default="",
+        help="Requests all the songs whose names match the given words.")
+    argp.add_argument(
+        "-o", "--order", choices=PLAN_ORDERS, default="server",
+        help="Order in which the missing songs are requested.")
+    argp.add_argument(
+        "-t", "--trim", action="store_true",
+        help="Requests only the missing songs that fit into the free disk "
+        "space instead of refusing the request.")
 
     args = argp.parse_args()
 
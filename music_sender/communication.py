@@ -5,6 +5,24 @@ import os
 import socket
 import subprocess
 import sys
+import zlib
+
+
+class ChecksumError(ConnectionError):
+    """Raised when the bytes of a received file don't match the
+    checksums sent by the remote. The received bytes are kept in the
+    file's partial file (see Communicator.PART_SUFFIX).
+
+    Attributes:
+        filename: The name of the corrupted file.
+        segments: A dict mapping each corrupted segment of the file
+                  to the checksum it was expected to have.
+    """
+
+    def __init__(self, filename: str, segments: dict[int, str]):
+        super().__init__(f"{filename} is corrupted")
+        self.filename = filename
+        self.segments = segments
 
 
 class Communicator:
@@ -13,6 +31,15 @@ class Communicator:
     """
 
     BUFFER_SIZE = 4096
+    # File bytes are streamed in bigger chunks than messages, so the
+    # per-chunk work (syscalls and checksumming) stays cheap.
+    FILE_BUFFER_SIZE = 64 * 1024
+    # Files are checksummed in segments of this size, so a corrupted
+    # segment can be requested again on its own.
+    SEGMENT_SIZE = 1024 * 1024
+    # Files are received into '<filename><PART_SUFFIX>' and only get
+    # their name once they are verified.
+    PART_SUFFIX = ".part"
 
     def __init__(self) -> None:
         self.sock: socket.socket = None
@@ -38,7 +65,10 @@ class Communicator:
 
         self.sock.send(msg_header.encode())
 
-        ack_size = int(self.sock.recv(Communicator.BUFFER_SIZE))
+        ack_header = self.sock.recv(Communicator.BUFFER_SIZE)
+        if ack_header == b"":
+            raise ConnectionResetError
+        ack_size = int(ack_header)
 
         msg_buffer = io.BytesIO(message)
         while True:
@@ -51,6 +81,8 @@ class Communicator:
         ack = b""
         while rcvd_size != ack_size:
             ack_data = self.sock.recv(Communicator.BUFFER_SIZE)
+            if ack_data == b"":
+                raise ConnectionResetError
             rcvd_size += len(ack_data)
             ack += ack_data
 
@@ -88,6 +120,8 @@ class Communicator:
         msg = b""
         while rcvd_size != msg_size:
             data = self.sock.recv(Communicator.BUFFER_SIZE)
+            if data == b"":
+                raise ConnectionResetError
             rcvd_size += len(data)
             msg += data
 
@@ -96,7 +130,9 @@ class Communicator:
         return msg
 
     def sendfile(self, filename: str):
-        """Sends bytes from a file to a remote socket.
+        """Sends bytes from a file to a remote socket. The bytes are
+        checksummed while being sent and the checksum of each segment
+        is sent afterwards as a trailer.
 
         Args:
             filename: The file where the bytes come from to be
@@ -112,19 +148,39 @@ class Communicator:
                 When the remote doesn't closes connection properly.
         """
 
+        checksums = []
         with open(filename, "rb") as file:
             file_size = os.stat(file.name).st_size
             self.send(f"{filename}:{file_size}".encode())
 
-            while True:
-                data = file.read(Communicator.BUFFER_SIZE)
+            sent_len = 0
+            checksum = 0
+            while sent_len != file_size:
+                # Never read past the current segment.
+                segment_left = (Communicator.SEGMENT_SIZE
+                                - sent_len % Communicator.SEGMENT_SIZE)
+                data = file.read(min(Communicator.FILE_BUFFER_SIZE,
+                                     segment_left, file_size - sent_len))
                 if data == b"":
-                    break
-                self.sock.send(data)
+                    # The file has shrunk since it was announced.
+                    raise ConnectionResetError
+                self.sock.sendall(data)
+                checksum = zlib.crc32(data, checksum)
+                sent_len += len(data)
+
+                if (sent_len % Communicator.SEGMENT_SIZE == 0
+                        or sent_len == file_size):
+                    checksums.append(f"{checksum:08x}")
+                    checksum = 0
+
+        self.send(",".join(checksums).encode())
 
     def recvfile(self):
         """Receives bytes of a file from a remote socket and write
-        them into a file.
+        them into a file. The bytes are checksummed while being
+        received and verified against the trailer sent by
+        Communicator.sendfile(). The file only gets its name once it
+        is verified; until then it is written into its partial file.
 
         Raises:
             IndexError:
@@ -135,6 +191,12 @@ class Communicator:
                 the server, the client will receive a 'out-of-bounds'
                 message from the server.
 
+            ChecksumError:
+                When the received bytes don't match the checksums sent
+                by the remote. The partial file is kept so the
+                corrupted segments can be fixed with
+                Communicator.recvsegment().
+
             BrokenPipeError:
                 When the remote closes connection to this remote.
             
@@ -149,15 +211,113 @@ class Communicator:
         if data == "out-of-bounds":
             raise IndexError
 
-        filename, filesize = data.split(":")
+        filename, filesize = data.rsplit(":", 1)
+        part_filename = filename + Communicator.PART_SUFFIX
 
+        try:
+            checksums = self._recvfile_data(part_filename, int(filesize))
+
+            trailer = self.recv().decode()
+            expected_checksums = trailer.split(",") if trailer else []
+            if len(expected_checksums) != len(checksums):
+                raise ConnectionResetError
+
+            corrupted_segments = {
+                segment: expected
+                for segment, (expected, checksum)
+                in enumerate(zip(expected_checksums, checksums))
+                if expected != checksum}
+            if corrupted_segments:
+                raise ChecksumError(filename, corrupted_segments)
+
+            os.replace(part_filename, filename)
+        except ChecksumError:
+            # The part file is kept for its segments to be fixed.
+            raise
+        except BaseException:
+            # An interrupted stream (or a failure writing it) must not
+            # leave a truncated song behind.
+            _remove_part_file(part_filename)
+            raise
+
+    def _recvfile_data(self, filename: str, filesize: int) -> list[str]:
+        checksums = []
         rcvd_len = 0
+        checksum = 0
         with open(filename, "wb") as file:
-            while rcvd_len != int(filesize):
-                data = self.sock.recv(Communicator.BUFFER_SIZE)
+            while rcvd_len != filesize:
+                # Never read past the current segment, nor past the
+                # file into the trailer.
+                segment_left = (Communicator.SEGMENT_SIZE
+                                - rcvd_len % Communicator.SEGMENT_SIZE)
+                data = self.sock.recv(min(Communicator.FILE_BUFFER_SIZE,
+                                          segment_left, filesize - rcvd_len))
+                if data == b"":
+                    raise ConnectionResetError
                 file.write(data)
+                checksum = zlib.crc32(data, checksum)
                 rcvd_len += len(data)
 
+                if (rcvd_len % Communicator.SEGMENT_SIZE == 0
+                        or rcvd_len == filesize):
+                    checksums.append(f"{checksum:08x}")
+                    checksum = 0
+        return checksums
+
+    def sendsegment(self, filename: str, segment: int):
+        """Sends a single segment of a file to a remote socket.
+
+        Args:
+            filename: The file where the segment comes from.
+            segment: The index of the segment in the file.
+
+        Raises:
+            BrokenPipeError:
+                When the remote closes connection to this remote.
+
+            ConnectionResetError:
+                When the remote doesn't closes connection properly.
+        """
+
+        with open(filename, "rb") as file:
+            file.seek(segment * Communicator.SEGMENT_SIZE)
+            self.send(file.read(Communicator.SEGMENT_SIZE))
+
+    def recvsegment(self, filename: str, segment: int, checksum: str):
+        """Receives a single segment of a file from a remote socket and
+        writes it into its place in the file's partial file.
+
+        Args:
+            filename: The file whose partial file the segment is
+                      written to.
+            segment: The index of the segment in the file.
+            checksum: The checksum the segment is expected to have.
+
+        Raises:
+            ChecksumError:
+                When the received segment doesn't match checksum.
+
+            BrokenPipeError:
+                When the remote closes connection to this remote.
+
+            ConnectionResetError:
+                When the remote doesn't closes connection properly.
+        """
+
+        data = self.recv()
+        if f"{zlib.crc32(data):08x}" != checksum:
+            raise ChecksumError(filename, {segment: checksum})
+
+        with open(filename + Communicator.PART_SUFFIX, "r+b") as file:
+            file.seek(segment * Communicator.SEGMENT_SIZE)
+            file.write(data)
+
+
+def _remove_part_file(part_filename: str):
+    # The part file may not exist if it couldn't be created at all.
+    if os.path.exists(part_filename):
+        os.remove(part_filename)
+
 
 def connection(request):
     """Decorator function which executes essential code before making
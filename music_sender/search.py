@@ -0,0 +1,153 @@
+"""Song catalog search index module."""
+
+import bisect
+import os
+import re
+import threading
+import time
+
+from .utils import is_music_file
+
+
+def tokenize(text: str) -> set[str]:
+    """Splits a text into lowercase alphanumeric tokens."""
+
+    return set(re.findall(r"[^\W_]+", text.lower()))
+
+
+class SongIndex:
+    """Catalog of the songs in the working directory along with a
+    token inverted index over their names.
+
+    The index is kept up-to-date incrementally: every refresh only
+    indexes the songs that were added and drops the ones that were
+    removed since the last refresh.
+    """
+
+    # Coarsest directory mtime resolution the index copes with (FAT
+    # stores mtimes in 2 seconds steps).
+    MTIME_RESOLUTION = 2
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._directory_mtime = None
+        self._songs: list[str] = []
+        self._positions: dict[str, int] = {}
+        # token -> names of the songs containing that token
+        self._postings: dict[str, set[str]] = {}
+        # Sorted list of the indexed tokens, used for prefix lookups.
+        self._tokens: list[str] = []
+
+    def refresh(self) -> list[str]:
+        """Synchronizes the index with the working directory.
+
+        Returns:
+            The list of songs in the working directory. A song's
+            position in this list is the index used in the 'request
+            <index>' request.
+        """
+
+        # Adding, removing or renaming files updates the directory's
+        # mtime, so the directory only needs to be listed again when
+        # it has changed.
+        directory_mtime = os.stat(".").st_mtime_ns
+        if directory_mtime == self._directory_mtime:
+            return self._songs
+
+        with self._lock:
+            # Another thread may have synchronized the index while
+            # this one was waiting for the lock.
+            if directory_mtime == self._directory_mtime:
+                return self._songs
+
+            songs = list(filter(is_music_file, os.listdir(".")))
+            if songs != self._songs:
+                self._update(songs)
+
+            # A file added within the same mtime tick wouldn't change
+            # the mtime, so a recent mtime isn't trusted and the
+            # directory keeps being listed until it settles.
+            if (time.time() - directory_mtime / 1e9
+                    < SongIndex.MTIME_RESOLUTION):
+                directory_mtime = None
+
+            # Only published once the songs are, so the unlocked check
+            # above never returns a list older than the directory.
+            self._directory_mtime = directory_mtime
+            return self._songs
+
+    def search(self, query: str) -> list[tuple[int, str]]:
+        """Searches for songs whose names match every token in the
+        query. Query tokens match as prefixes, so 'beat' matches
+        'Beatles'.
+
+        Returns:
+            A list containing tuples that contains respectively the
+            song's index and name, ordered by index.
+        """
+
+        self.refresh()
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            matches = None
+            for query_token in query_tokens:
+                token_matches = self._prefix_matches(query_token)
+                matches = token_matches if matches is None \
+                    else matches & token_matches
+                if not matches:
+                    return []
+
+            return sorted((self._positions[song], song) for song in matches)
+
+    def _update(self, songs: list[str]):
+        current = set(songs)
+        for song in self._positions.keys() - current:
+            self._remove(song)
+
+        new_tokens = []
+        for song in current - self._positions.keys():
+            new_tokens.extend(self._add(song))
+        if len(new_tokens) > 64:
+            # Bulk additions (e.g. the first refresh) are cheaper to
+            # sort at once than to insert one by one.
+            self._tokens.extend(new_tokens)
+            self._tokens.sort()
+        else:
+            for token in new_tokens:
+                bisect.insort(self._tokens, token)
+
+        self._songs = songs
+        self._positions = {song: i for i, song in enumerate(songs)}
+
+    def _prefix_matches(self, prefix: str) -> set[str]:
+        matches = set()
+        i = bisect.bisect_left(self._tokens, prefix)
+        while i < len(self._tokens) and self._tokens[i].startswith(prefix):
+            matches |= self._postings[self._tokens[i]]
+            i += 1
+        return matches
+
+    def _add(self, song: str) -> list[str]:
+        """Indexes a song and returns the tokens that weren't indexed
+        yet. Those are left to the caller to be inserted into the
+        sorted token list.
+        """
+
+        new_tokens = []
+        for token in tokenize(song):
+            if token not in self._postings:
+                self._postings[token] = set()
+                new_tokens.append(token)
+            self._postings[token].add(song)
+        return new_tokens
+
+    def _remove(self, song: str):
+        for token in tokenize(song):
+            postings = self._postings[token]
+            postings.discard(song)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
@@ -9,13 +9,15 @@ from socketserver import BaseRequestHandler, ThreadingTCPServer
 import colorama
 
 from .communication import Communicator, get_machine_local_ip
-from .utils import is_music_file, set_working_directory
+from .search import SongIndex
+from .utils import set_working_directory
 
 
 class MusicSenderHandler(Communicator, BaseRequestHandler):
     """Music Sender request handler."""
 
     REQUEST_CODE = 0
+    SONG_INDEX = SongIndex()
 
     def __init__(self, request, client_address, server) -> None:
         super().__init__()
@@ -63,6 +65,31 @@ class MusicSenderHandler(Communicator, BaseRequestHandler):
                     break
                 print(colorama.Fore.GREEN
                       + "[*] PROCESSING \"list\" REQUEST FINISHED")
+            elif message == b"list-meta":
+                print(colorama.Fore.YELLOW
+                      + "[*] PROCESSING \"list-meta\" REQUEST")
+                try:
+                    self.list_meta_request()
+                except (BrokenPipeError, ConnectionResetError):
+                    print(colorama.Fore.RED + colorama.Style.BRIGHT
+                          + "[X] FAILED TO SEND LIST TO CLIENT. CLIENT "
+                          "CONNECTION CLOSED")
+                    break
+                print(colorama.Fore.GREEN
+                      + "[*] PROCESSING \"list-meta\" REQUEST FINISHED")
+            elif message.startswith(b"search "):
+                query = message[7:].decode()
+                print(colorama.Fore.YELLOW
+                      + f"[*] SEARCHING FOR \"{query}\"")
+                try:
+                    self.search_request(query)
+                except (BrokenPipeError, ConnectionResetError):
+                    print(colorama.Fore.RED + colorama.Style.BRIGHT
+                          + "[X] FAILED TO SEND SEARCH RESULTS TO CLIENT. "
+                          "CLIENT CONNECTION CLOSED")
+                    break
+                print(colorama.Fore.GREEN
+                      + f"[*] SEARCH FOR \"{query}\" FINISHED")
             elif re.match(r"request \d+", message.decode()):
                 index = int(message[8:])
                 try:
@@ -82,6 +109,28 @@ class MusicSenderHandler(Communicator, BaseRequestHandler):
                     break
                 print(colorama.Fore.GREEN
                       + f"[*] {song_name} WAS SENT TO THE CLIENT")
+            elif re.match(r"segment \d+ \d+", message.decode()):
+                index, segment = map(int, message[8:].split())
+                try:
+                    song_name = self._get_songs(index)
+                except IndexError:
+                    print(colorama.Fore.RED + "INDEX IS OUT OF BOUNDS")
+                    self.send(b"out-of-bounds")
+                    break
+
+                print(colorama.Fore.YELLOW
+                      + f"[*] SENDING SEGMENT {segment} OF {song_name} TO "
+                      "CLIENT")
+                try:
+                    self.sendsegment(song_name, segment)
+                except (BrokenPipeError, ConnectionResetError):
+                    print(colorama.Fore.RED + colorama.Style.BRIGHT
+                          + f"[X] FAILED TO SEND SEGMENT {segment} OF "
+                          f"{song_name} TO CLIENT")
+                    break
+                print(colorama.Fore.GREEN
+                      + f"[*] SEGMENT {segment} OF {song_name} WAS SENT TO "
+                      "THE CLIENT")
         self.sock.close()
 
     def list_request(self):
@@ -97,6 +146,47 @@ class MusicSenderHandler(Communicator, BaseRequestHandler):
         songs = songs if songs else "no-song-available"
         self.send(songs.encode())
 
+    def list_meta_request(self):
+        """Process a 'list-meta' request from the client. Each song is
+        sent along with its size in bytes and its modification time,
+        following the format '<name>:<size>:<mtime>'. Songs keep the
+        same order (and therefore the same indexes) as in the 'list'
+        reply.
+
+        Raises:
+            BrokenPipeError:
+                When client socket suddenly stops its connection to
+                the server.
+        """
+
+        entries = []
+        for song in self._get_songs():
+            song_stat = os.stat(song)
+            entries.append(f"{song}:{song_stat.st_size}:{song_stat.st_mtime}")
+
+        songs = "$sep".join(entries)
+        songs = songs if songs else "no-song-available"
+        self.send(songs.encode())
+
+    def search_request(self, query: str):
+        """Process a 'search <query>' request from the client. The
+        matching songs are sent along with their indexes, following
+        the format '<index>:<name>'.
+
+        Args:
+            query: Words to be looked up in the songs' names.
+
+        Raises:
+            BrokenPipeError:
+                When client socket suddenly stops its connection to
+                the server.
+        """
+
+        songs = "$sep".join(f"{index}:{song}" for index, song
+                            in self.SONG_INDEX.search(query))
+        songs = songs if songs else "no-song-matched"
+        self.send(songs.encode())
+
     def song_request(self, index: int):
         """Process a 'request <index>' request from the client. It
         sends the requested file bytes.
@@ -114,8 +204,8 @@ class MusicSenderHandler(Communicator, BaseRequestHandler):
 
     def _get_songs(self, index: int = None) -> list[str] or str:
         if index is not None:
-            return list(filter(is_music_file, os.listdir(".")))[index]
-        return list(filter(is_music_file, os.listdir(".")))
+            return self.SONG_INDEX.refresh()[index]
+        return self.SONG_INDEX.refresh()
 
 
 def main():
@@ -135,6 +225,10 @@ def main():
         # Exit the application if the function failed to change directory
         return
 
+    # Build the search index up front, so the first client doesn't wait
+    # for the whole catalog to be indexed.
+    MusicSenderHandler.SONG_INDEX.refresh()
+
     host, port = get_machine_local_ip(), args.port
     with ThreadingTCPServer((host, port), MusicSenderHandler) as server:
         print(colorama.Fore.GREEN + colorama.Style.BRIGHT
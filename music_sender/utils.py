@@ -12,7 +12,9 @@ def is_music_file(filename: str) -> bool:
     """
 
     music_exts = [".mp3", ".m4a", ".ogg", ".opus", ".flac"]
-    return any(list(filter(lambda ext: ext in filename, music_exts)))
+    # Only the last extension counts, so partial downloads (e.g.
+    # 'song.mp3.part') aren't taken for songs.
+    return os.path.splitext(filename)[1] in music_exts
 
 
 def set_working_directory(path: str) -> bool:
@@ -54,3 +56,23 @@ def address_valid(addr: tuple[str, int]) -> bool:
         print(colorama.Fore.RED + "Port given is out of range.")
 
     return host_valid and port_valid
+
+
+def human_size(size: int) -> str:
+    """Formats a size in bytes into a human readable string (e.g.
+    '4.2 MiB').
+    """
+
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def human_time(seconds: float) -> str:
+    """Formats an amount of seconds into a 'HH:MM:SS' string."""
+
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
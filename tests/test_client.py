@@ -0,0 +1,122 @@
+"""Tests for the metadata listing and the download planner."""
+
+import threading
+from collections import namedtuple
+from socketserver import ThreadingTCPServer
+
+import pytest
+
+from music_sender import client
+from music_sender.client import (MusicSenderClient, plan_downloads,
+                                 request_missing_out)
+from music_sender.server import MusicSenderHandler
+from music_sender.utils import human_size, human_time
+
+SONGS = [(0, "medium.mp3", 500, 0.0), (1, "big.mp3", 900, 0.0),
+         (2, "small.mp3", 100, 0.0)]
+
+DiskUsage = namedtuple("DiskUsage", ["total", "used", "free"])
+
+
+class FakeClient:
+    """Stands in for MusicSenderClient, recording the requested
+    songs.
+    """
+
+    def __init__(self, songs):
+        self.songs = songs
+        self.requested = []
+
+    def missing_songs_metadata_list(self):
+        return self.songs
+
+    def request_song(self, index: int):
+        self.requested.append(index)
+
+
+def indexes(songs) -> list[int]:
+    return [song[0] for song in songs]
+
+
+@pytest.mark.parametrize("order, expected", [
+    ("server", [0, 1, 2]),
+    ("smallest", [2, 0, 1]),
+    ("largest", [1, 0, 2]),
+])
+def test_plan_downloads_order(order, expected):
+    planned, left_out = plan_downloads(SONGS, order, 10_000)
+    assert indexes(planned) == expected
+    assert left_out == []
+
+
+def test_plan_downloads_overflowing_free_space():
+    planned, left_out = plan_downloads(SONGS, "largest", 1000)
+    # big.mp3 fits first, then medium.mp3 doesn't but small.mp3 does.
+    assert indexes(planned) == [1, 2]
+    assert indexes(left_out) == [0]
+
+    planned, left_out = plan_downloads(SONGS, "smallest", 50)
+    assert planned == []
+    assert indexes(left_out) == [2, 0, 1]
+
+
+def test_request_missing_out_refuses_overflowing_plan(monkeypatch):
+    monkeypatch.setattr(client.shutil, "disk_usage",
+                        lambda path: DiskUsage(10_000, 9_400, 600))
+    fake_client = FakeClient(SONGS)
+
+    request_missing_out(fake_client, "smallest")
+    assert fake_client.requested == []
+
+
+def test_request_missing_out_trims_overflowing_plan(monkeypatch):
+    monkeypatch.setattr(client.shutil, "disk_usage",
+                        lambda path: DiskUsage(10_000, 9_400, 600))
+    fake_client = FakeClient(SONGS)
+
+    request_missing_out(fake_client, "smallest", trim=True)
+    assert fake_client.requested == [2, 0]
+
+
+def test_request_missing_out_downloads_everything_that_fits(monkeypatch):
+    monkeypatch.setattr(client.shutil, "disk_usage",
+                        lambda path: DiskUsage(10_000, 0, 10_000))
+    fake_client = FakeClient(SONGS)
+
+    request_missing_out(fake_client, "largest")
+    assert fake_client.requested == [1, 0, 2]
+
+
+def test_songs_metadata_list_matches_list(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sizes = {"a:weird:name.mp3": 10, "Queen - Bohemian Rhapsody.ogg": 2000,
+             "track.flac": 0}
+    for filename, size in sizes.items():
+        (tmp_path / filename).write_bytes(b"x" * size)
+    (tmp_path / "cover.jpg").write_bytes(b"x")
+
+    with ThreadingTCPServer(("127.0.0.1", 0), MusicSenderHandler) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            music_client = MusicSenderClient(server.server_address)
+            songs = music_client.songs_list()
+            metadata = music_client.songs_metadata_list()
+        finally:
+            server.shutdown()
+
+    assert [(index, name) for index, name, _, _ in metadata] == songs
+    for _, name, size, mtime in metadata:
+        assert size == sizes[name]
+        assert mtime == (tmp_path / name).stat().st_mtime
+
+
+def test_human_size():
+    assert human_size(0) == "0 B"
+    assert human_size(523.123456) == "523 B"
+    assert human_size(2048) == "2.0 KiB"
+    assert human_size(5 * 1024 ** 2) == "5.0 MiB"
+
+
+def test_human_time():
+    assert human_time(0) == "00:00:00"
+    assert human_time(3725.9) == "01:02:05"
@@ -0,0 +1,146 @@
+"""Tests for the file transfer layer."""
+
+import os
+import socket
+import threading
+import zlib
+
+import pytest
+
+from music_sender.communication import ChecksumError, Communicator
+
+
+class FlakySocket:
+    """Socket wrapper corrupting the first byte of the chunk sent at
+    a given offset of the stream.
+    """
+
+    def __init__(self, sock: socket.socket, corrupt_at: int):
+        self.sock = sock
+        self.corrupt_at = corrupt_at
+        self.sent = 0
+
+    def sendall(self, data: bytes):
+        if self.sent == self.corrupt_at:
+            data = bytes([data[0] ^ 0xff]) + data[1:]
+        self.sent += len(data)
+        self.sock.sendall(data)
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+@pytest.fixture
+def communicators(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    # Small segments, so a few KiB already span several of them.
+    monkeypatch.setattr(Communicator, "SEGMENT_SIZE",
+                        2 * Communicator.BUFFER_SIZE)
+
+    sender, receiver = Communicator(), Communicator()
+    sender.sock, receiver.sock = socket.socketpair()
+    yield sender, receiver
+    sender.sock.close()
+    receiver.sock.close()
+
+
+def in_thread(function, *args) -> threading.Thread:
+    thread = threading.Thread(target=function, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def write_song(size: int) -> bytes:
+    song = os.urandom(size)
+    with open("song.mp3", "wb") as file:
+        file.write(song)
+    return song
+
+
+def read_file(filename: str) -> bytes:
+    with open(filename, "rb") as file:
+        return file.read()
+
+
+@pytest.mark.parametrize("size", [0, 100, 8192, 8192 * 3 + 5])
+def test_file_roundtrip(communicators, size):
+    sender, receiver = communicators
+    song = write_song(size)
+
+    # The received file replaces the sent one only after the trailer,
+    # once the sender is done reading it.
+    sending = in_thread(sender.sendfile, "song.mp3")
+    receiver.recvfile()
+    sending.join()
+
+    assert read_file("song.mp3") == song
+    assert not os.path.exists("song.mp3" + Communicator.PART_SUFFIX)
+
+
+def test_interrupted_stream_leaves_no_file(communicators):
+    sender, receiver = communicators
+
+    def send_truncated():
+        sender.send(b"other.mp3:30000")
+        sender.sock.sendall(os.urandom(10000))
+        sender.sock.shutdown(socket.SHUT_RDWR)
+
+    in_thread(send_truncated)
+    with pytest.raises(ConnectionResetError):
+        receiver.recvfile()
+
+    assert not os.path.exists("other.mp3")
+    assert not os.path.exists("other.mp3" + Communicator.PART_SUFFIX)
+
+
+def test_corrupted_segment_is_refetched(communicators):
+    sender, receiver = communicators
+    song = write_song(8192 * 3 + 5)
+    segment_size = Communicator.SEGMENT_SIZE
+    sender.sock = FlakySocket(sender.sock, corrupt_at=segment_size)
+
+    sending = in_thread(sender.sendfile, "song.mp3")
+    with pytest.raises(ChecksumError) as error:
+        receiver.recvfile()
+    sending.join()
+
+    segment = song[segment_size:2 * segment_size]
+    assert error.value.segments == {1: f"{zlib.crc32(segment):08x}"}
+
+    sending = in_thread(sender.sendsegment, "song.mp3", 1)
+    receiver.recvsegment("song.mp3", 1, error.value.segments[1])
+    sending.join()
+
+    assert read_file("song.mp3" + Communicator.PART_SUFFIX) == song
+
+
+def test_recv_raises_when_remote_closes_mid_message(communicators):
+    sender, receiver = communicators
+
+    def send_truncated():
+        sender.sock.send(b"100")
+        sender.sock.recv(Communicator.BUFFER_SIZE)
+        sender.sock.sendall(b"x" * 10)
+        sender.sock.shutdown(socket.SHUT_RDWR)
+
+    in_thread(send_truncated)
+    with pytest.raises(ConnectionError):
+        receiver.recv()
+
+
+def test_failed_write_leaves_no_part_file(communicators, monkeypatch):
+    sender, receiver = communicators
+
+    def fail_writing(filename, filesize):
+        open(filename, "wb").close()
+        raise OSError("No space left on device")
+
+    def send_header():
+        sender.send(b"other.mp3:30000")
+
+    monkeypatch.setattr(receiver, "_recvfile_data", fail_writing)
+    in_thread(send_header)
+    with pytest.raises(OSError):
+        receiver.recvfile()
+
+    assert not os.path.exists("other.mp3" + Communicator.PART_SUFFIX)
@@ -0,0 +1,114 @@
+"""Tests for the song catalog search index."""
+
+import os
+import threading
+from socketserver import ThreadingTCPServer
+
+import pytest
+
+from music_sender.client import MusicSenderClient
+from music_sender.search import SongIndex
+from music_sender.server import MusicSenderHandler
+
+
+def touch(*filenames: str):
+    for filename in filenames:
+        open(filename, "wb").close()
+
+
+@pytest.fixture
+def music_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    touch("The Beatles - Help.mp3", "Beatles_Yesterday.flac",
+          "Queen - Bohemian Rhapsody.ogg", "cover.jpg")
+    return tmp_path
+
+
+def names(results: list[tuple[int, str]]) -> set[str]:
+    return {song for _, song in results}
+
+
+def test_refresh_lists_music_files_only(music_dir):
+    songs = SongIndex().refresh()
+    assert sorted(songs) == sorted(
+        ["The Beatles - Help.mp3", "Beatles_Yesterday.flac",
+         "Queen - Bohemian Rhapsody.ogg"])
+
+
+def test_search_prefix_matches(music_dir):
+    index = SongIndex()
+    assert names(index.search("beat")) == {
+        "The Beatles - Help.mp3", "Beatles_Yesterday.flac"}
+    assert names(index.search("QUEEN")) == {"Queen - Bohemian Rhapsody.ogg"}
+    assert index.search("eatles") == []
+    assert index.search("") == []
+
+
+def test_search_matches_every_token(music_dir):
+    index = SongIndex()
+    assert names(index.search("beatles help")) == {"The Beatles - Help.mp3"}
+    assert names(index.search("help beat")) == {"The Beatles - Help.mp3"}
+    assert index.search("beatles queen") == []
+
+
+def test_search_after_adding_and_removing_files(music_dir):
+    index = SongIndex()
+    index.search("beatles")
+
+    touch("Beatles - Let It Be.mp3")
+    os.remove("Beatles_Yesterday.flac")
+    assert names(index.search("beatles")) == {
+        "The Beatles - Help.mp3", "Beatles - Let It Be.mp3"}
+    assert index.search("yesterday") == []
+
+    # Tokens left without songs must be dropped from prefix lookups.
+    os.remove("Queen - Bohemian Rhapsody.ogg")
+    assert index.search("queen") == []
+    assert index.search("bohemian") == []
+
+
+def test_bulk_additions_are_searchable(music_dir):
+    index = SongIndex()
+    index.refresh()
+
+    # Enough new tokens to take the sorting path instead of insort.
+    touch(*(f"artist{i} song{i}.mp3" for i in range(100)))
+    assert names(index.search("artist42")) == {"artist42 song42.mp3"}
+    assert len(index.search("song")) == 100
+
+
+def test_search_indexes_match_list_indexes(music_dir):
+    touch(*(f"track {i}.mp3" for i in range(20)))
+
+    with ThreadingTCPServer(("127.0.0.1", 0), MusicSenderHandler) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            client = MusicSenderClient(server.server_address)
+            songs = dict(client.songs_list())
+            results = client.search_songs("track")
+        finally:
+            server.shutdown()
+
+    assert len(results) == 20
+    for index, song in results:
+        assert songs[index] == song
+
+
+def test_partial_downloads_are_not_songs(music_dir):
+    touch("Beatles - Let It Be.mp3.part", "notes.mp3.txt")
+    index = SongIndex()
+    assert "Beatles - Let It Be.mp3.part" not in index.refresh()
+    assert "notes.mp3.txt" not in index.refresh()
+    assert names(index.search("let")) == set()
+
+
+def test_files_added_within_the_same_mtime_tick_are_found(music_dir):
+    index = SongIndex()
+    index.refresh()
+    directory_mtime = os.stat(".").st_mtime_ns
+
+    # Emulates a filesystem with coarse timestamps, where adding a file
+    # right after a refresh leaves the directory's mtime unchanged.
+    touch("Beatles - Let It Be.mp3")
+    os.utime(".", ns=(directory_mtime, directory_mtime))
+    assert names(index.search("let")) == {"Beatles - Let It Be.mp3"}